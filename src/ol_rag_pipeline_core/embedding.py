@@ -29,22 +29,24 @@ class EmbeddingClient:
         if self.retry_backoff_s < 0:
             raise ValueError("retry_backoff_s must be >= 0")
 
+        # `max_batch_chars` is a per-text limit (as embedding APIs define it), not a budget for
+        # the whole request: batches are cut by count, and only a text longer than the limit
+        # is sent on its own so a 413 can't take its neighbours down with it.
         batches: list[list[str]] = []
         cur: list[str] = []
-        cur_chars = 0
 
         for t in texts:
             t = t or ""
-            t_chars = len(t)
-            would_exceed = cur and (
-                (len(cur) + 1 > self.max_batch_texts) or (cur_chars + t_chars > self.max_batch_chars)
-            )
-            if would_exceed:
+            if len(t) > self.max_batch_chars:
+                if cur:
+                    batches.append(cur)
+                    cur = []
+                batches.append([t])
+                continue
+            cur.append(t)
+            if len(cur) == self.max_batch_texts:
                 batches.append(cur)
                 cur = []
-                cur_chars = 0
-            cur.append(t)
-            cur_chars += t_chars
 
         if cur:
             batches.append(cur)
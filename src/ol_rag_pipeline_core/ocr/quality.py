@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import re
 from dataclasses import dataclass
 
+from ol_rag_pipeline_core.util import count_ascii_alpha
 
-_ALPHA_RE = re.compile(r"[A-Za-z]")
-_PRINTABLE_RE = re.compile(r"[\x20-\x7E\n\t]")
+# Both character classes are ASCII-only, so counts come from encoding once and deleting the
+# complement with bytes.translate rather than from regex findall lists.
+_NON_PRINTABLE = bytes(b for b in range(256) if not (0x20 <= b < 0x7F or b in b"\n\t"))
 
 
 @dataclass(frozen=True)
@@ -36,8 +37,9 @@ def assess_ocr_text_quality(text: str) -> OcrQualityReport:
         )
 
     chars = len(normalized)
-    alpha = len(_ALPHA_RE.findall(normalized))
-    printable = len(_PRINTABLE_RE.findall(normalized))
+    ascii_bytes = normalized.encode("ascii", "ignore")
+    alpha = count_ascii_alpha(ascii_bytes)
+    printable = len(ascii_bytes.translate(None, _NON_PRINTABLE))
     return OcrQualityReport(
         chars=chars,
         alpha_chars=alpha,
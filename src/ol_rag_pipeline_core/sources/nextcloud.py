@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import xml.etree.ElementTree as ET
+from collections.abc import Generator, Iterator
 from dataclasses import dataclass
 from urllib.parse import urljoin
 
@@ -19,8 +20,17 @@ class WebDavFile:
         return self.href.rstrip("/").split("/")[-1]
 
 
-def _propfind_body() -> bytes:
-    return b"""<?xml version="1.0" encoding="utf-8" ?>
+# Clark-notation paths, resolved once instead of re-expanding the "d:" prefix on every lookup.
+_DAV_RESPONSE = "{DAV:}response"
+_DAV_HREF = "{DAV:}href"
+_DAV_PROP = "{DAV:}propstat/{DAV:}prop"
+_DAV_RESOURCETYPE = "{DAV:}resourcetype"
+_DAV_GETETAG = "{DAV:}getetag"
+_DAV_GETCONTENTLENGTH = "{DAV:}getcontentlength"
+_DAV_GETCONTENTTYPE = "{DAV:}getcontenttype"
+
+
+_PROPFIND_BODY = b"""<?xml version="1.0" encoding="utf-8" ?>
 <d:propfind xmlns:d="DAV:">
   <d:prop>
     <d:getetag/>
@@ -32,48 +42,103 @@ def _propfind_body() -> bytes:
 """
 
 
-def list_webdav_files(
+def _webdav_file_from_response(resp: ET.Element) -> WebDavFile | None:
+    href = resp.findtext(_DAV_HREF, default="")
+    if not href or href.endswith("/"):
+        return None
+    prop = resp.find(_DAV_PROP)
+    if prop is None:
+        return None
+    res_type = prop.find(_DAV_RESOURCETYPE)
+    if res_type is not None and len(res_type):
+        return None  # directory
+    etag = prop.findtext(_DAV_GETETAG)
+    size_text = prop.findtext(_DAV_GETCONTENTLENGTH)
+    content_type = prop.findtext(_DAV_GETCONTENTTYPE)
+    size = int(size_text) if size_text and size_text.isdigit() else None
+    return WebDavFile(href=href, etag=etag, size=size, content_type=content_type)
+
+
+def iter_webdav_files(
     *,
     webdav_base_url: str,
     folder_path: str,
     username: str,
     app_password: str,
     timeout_s: float = 20.0,
-) -> list[WebDavFile]:
+) -> Iterator[WebDavFile]:
+    """
+    Stream a Depth: 1 PROPFIND listing, yielding files as each `<d:response>` is parsed.
+
+    The multistatus body is fed to an incremental parser chunk by chunk and every response
+    subtree is cleared once handled, so memory stays bounded by a single entry rather than
+    the full listing.
+    """
     base = webdav_base_url if webdav_base_url.endswith("/") else webdav_base_url + "/"
     folder = folder_path.strip("/") + "/"
     url = urljoin(base, folder)
 
     headers = {"Depth": "1"}
     with httpx.Client(timeout=timeout_s, follow_redirects=True) as client:
-        r = client.request(
+        with client.stream(
             "PROPFIND",
             url,
             headers=headers,
-            content=_propfind_body(),
+            content=_PROPFIND_BODY,
             auth=(username, app_password),
-        )
-        r.raise_for_status()
+        ) as r:
+            r.raise_for_status()
+            parser = ET.XMLPullParser(events=("start", "end"))
+            root: ET.Element | None = None
+            for chunk in r.iter_bytes():
+                parser.feed(chunk)
+                root = yield from _drain_responses(parser, root)
+            parser.close()
+            yield from _drain_responses(parser, root)
 
-    root = ET.fromstring(r.text)
-    ns = {"d": "DAV:"}
-    files: list[WebDavFile] = []
-    for resp in root.findall("d:response", ns):
-        href = resp.findtext("d:href", default="", namespaces=ns)
-        if not href or href.endswith("/"):
+
+def _drain_responses(
+    parser: ET.XMLPullParser, root: ET.Element | None
+) -> Generator[WebDavFile, None, ET.Element | None]:
+    # Returns the document root (the `<d:multistatus>`), captured from its start event.
+    for event, elem in parser.read_events():
+        if event == "start":
+            if root is None:
+                root = elem
             continue
-        prop = resp.find("d:propstat/d:prop", ns)
-        if prop is None:
+        if elem.tag != _DAV_RESPONSE:
             continue
-        res_type = prop.find("d:resourcetype", ns)
-        if res_type is not None and list(res_type):
-            continue  # directory
-        etag = prop.findtext("d:getetag", default=None, namespaces=ns)
-        size_text = prop.findtext("d:getcontentlength", default=None, namespaces=ns)
-        content_type = prop.findtext("d:getcontenttype", default=None, namespaces=ns)
-        size = int(size_text) if size_text and size_text.isdigit() else None
-        files.append(WebDavFile(href=href, etag=etag, size=size, content_type=content_type))
-    return files
+        f = _webdav_file_from_response(elem)
+        # Detach the handled entry: clearing alone would leave an empty child on the root
+        # for every entry in the listing.
+        elem.clear()
+        if root is not None and elem is not root:
+            try:
+                root.remove(elem)
+            except ValueError:
+                pass  # not a direct child of the multistatus; already emptied above
+        if f is not None:
+            yield f
+    return root
+
+
+def list_webdav_files(
+    *,
+    webdav_base_url: str,
+    folder_path: str,
+    username: str,
+    app_password: str,
+    timeout_s: float = 20.0,
+) -> list[WebDavFile]:
+    return list(
+        iter_webdav_files(
+            webdav_base_url=webdav_base_url,
+            folder_path=folder_path,
+            username=username,
+            app_password=app_password,
+            timeout_s=timeout_s,
+        )
+    )
 
 
 def download_webdav_file(
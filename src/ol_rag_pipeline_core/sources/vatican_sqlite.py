@@ -1,22 +1,28 @@
 from __future__ import annotations
 
 import json
+import math
+import re
 import sqlite3
+import threading
 import zlib
-from dataclasses import dataclass
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Literal
 from urllib.parse import urlparse
 
+from ol_rag_pipeline_core.util import json_loads
 
-@dataclass(frozen=True)
-class VaticanSqliteDocumentRow:
-    """
-    A single Vatican source record discovered from `vatican.db`.
+_UNPARSED = object()
 
-    Note: `row_id` is the Vatican sqlite primary key. We do NOT use it as the
-    pipeline `document_id` (we keep `document_id` stable from `source_uri`), but
-    it is useful for provenance and metadata joins later.
-    """
 
+@dataclass(frozen=True, slots=True)
+class _VaticanSqliteDocumentFields:
     row_id: str
     url: str
     title: str | None = None
@@ -28,29 +34,139 @@ class VaticanSqliteDocumentRow:
     bibliography: str | None = None
     language: str | None = None
     categories: list[str] | None = None
-    raw_json: dict | None = None
+    raw_json_text: str | bytes | None = field(default=None, repr=False)
+
+
+class VaticanSqliteDocumentRow(_VaticanSqliteDocumentFields):
+    """
+    A single Vatican source record discovered from `vatican.db`.
+
+    Note: `row_id` is the Vatican sqlite primary key. We do NOT use it as the
+    pipeline `document_id` (we keep `document_id` stable from `source_uri`), but
+    it is useful for provenance and metadata joins later.
+
+    `raw_json` is parsed from `raw_json_text` on first access; most discovery callers never
+    read it, so rows only carry the original string until then.
+    """
+
+    # The parsed value lives in a plain slot rather than a dataclass field, so it stays out of
+    # asdict(), equality and pickled/copied state; a copy simply parses again on first access.
+    __slots__ = ("_raw_json",)
+
+    @property
+    def raw_json(self) -> dict | None:
+        try:
+            return self._raw_json
+        except AttributeError:
+            pass
+        raw = _safe_json_loads(self.raw_json_text)
+        parsed = raw if isinstance(raw, dict) else None
+        object.__setattr__(self, "_raw_json", parsed)
+        return parsed
+
+
+def _connect_ro(sqlite_path: str) -> sqlite3.Connection:
+    """
+    Open `vatican.db` for a read-only discovery scan.
+
+    The file is a generated artifact that is never written while we read it, so it is opened
+    `immutable` (no locking or journal checks) and memory-mapped so btree pages come straight
+    from the OS page cache instead of per-page reads.
+    """
+    uri = f"{Path(sqlite_path).absolute().as_uri()}?mode=ro&immutable=1"
+    # The connection is cached and reused across discovery calls; a larger statement cache
+    # keeps every filter/partition/sampling variant prepared.
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+    conn.execute("pragma query_only=1")
+    conn.execute("pragma mmap_size=268435456")
+    conn.execute("pragma cache_size=-65536")
+    conn.execute("pragma temp_store=memory")
+    _register_functions(conn)
+    return conn
+
+
+def _register_functions(conn: sqlite3.Connection) -> None:
+    # Host and partition filtering run inside the sqlite VM so filtered-out rows never
+    # reach Python.
+    conn.create_function("url_host", 1, _sql_url_host(), deterministic=True)
+    conn.create_function("row_partition", 3, _row_partition, deterministic=True)
+
+
+# Absolute path -> ((mtime_ns, size), connection, lock) for the current version of the file.
+_RO_CONNECTIONS: dict[str, tuple[tuple[int, int], sqlite3.Connection, threading.Lock]] = {}
+_RO_CONNECTIONS_LOCK = threading.Lock()
+
+
+@contextmanager
+def _cached_ro(sqlite_path: str) -> Iterator[sqlite3.Connection]:
+    """
+    Shared read-only connection for `sqlite_path`, reused across discovery calls so repeated
+    scans skip the file open and keep sqlite's page cache warm. The connection is held
+    exclusively for the duration of the block.
+
+    One handle is kept per path. When the file is regenerated (mtime/size change) the handle
+    for the old version is closed and replaced, so its mmap and the replaced file's inode are
+    released instead of lingering on disk.
+    """
+    path = str(Path(sqlite_path).absolute())
+    while True:
+        st = Path(path).stat()
+        signature = (st.st_mtime_ns, st.st_size)
+        stale = None
+        with _RO_CONNECTIONS_LOCK:
+            entry = _RO_CONNECTIONS.get(path)
+            if entry is None or entry[0] != signature:
+                stale = entry
+                entry = (signature, _connect_ro(path), threading.Lock())
+                _RO_CONNECTIONS[path] = entry
+        if stale is not None:
+            # Waits for any scan still running on the old version.
+            with stale[2]:
+                stale[1].close()
+        with entry[2]:
+            # A concurrent call may have replaced (and closed) this handle meanwhile.
+            if _RO_CONNECTIONS.get(path) is not entry:
+                continue
+            yield entry[1]
+            return
+
 
+_URL_COLUMN = re.compile(r"url|link", re.IGNORECASE).search
 
-def _list_tables(conn: sqlite3.Connection) -> list[str]:
-    rows = conn.execute(
-        "select name from sqlite_master where type='table' order by name"
+
+def _table_schema(cur: sqlite3.Cursor) -> dict[str, list[str]]:
+    """
+    Map every table to its column names (in declaration order) with a single query.
+    """
+    rows = cur.execute(
+        "select m.name, p.name from sqlite_master m join pragma_table_info(m.name) p"
+        " where m.type = 'table' order by m.name, p.cid"
     ).fetchall()
-    return [r[0] for r in rows]
+    return {table: [c for _, c in group] for table, group in groupby(rows, key=itemgetter(0))}
 
 
-def _table_columns(conn: sqlite3.Connection, table: str) -> list[str]:
-    rows = conn.execute(f"pragma table_info({table})").fetchall()
-    return [r[1] for r in rows]
+def _row_id_column(cur: sqlite3.Cursor, table: str) -> str:
+    """
+    Column identifying a row of `table`: `rowid`, or the first primary-key column of a
+    `WITHOUT ROWID` table (which has no rowid).
+    """
+    # Probing beats pragma_table_list's `wr` flag, which needs sqlite 3.37+; system sqlite
+    # libraries on older distros predate it.
+    try:
+        cur.execute(f"select rowid from {table} limit 0")
+        return "rowid"
+    except sqlite3.OperationalError:
+        pass
+    (pk,) = cur.execute("select name from pragma_table_info(?) where pk = 1", (table,)).fetchone()
+    return pk
 
 
-def _safe_json_loads(value: str | None) -> object | None:
-    if value is None:
-        return None
-    value = value.strip()
+def _safe_json_loads(value: str | bytes | None) -> object | None:
+    # Whitespace-only payloads fail to parse, so no separate strip() pass is needed.
     if not value:
         return None
     try:
-        return json.loads(value)
+        return json_loads(value)
     except json.JSONDecodeError:
         return None
 
@@ -71,33 +187,169 @@ def _url_host(url: str) -> str | None:
     url = (url or "").strip()
     if not url:
         return None
-    parsed = urlparse(url if "://" in url else f"https://{url.lstrip('/')}")
+    try:
+        parsed = urlparse(url if "://" in url else f"https://{url.lstrip('/')}")
+    except ValueError:
+        return None
     host = (parsed.netloc or "").strip().lower()
     return host or None
 
 
+def _sql_url_host() -> Callable[[object], str | None]:
+    # sqlite evaluates `url_host(link)` once for the WHERE clause and again for the selected
+    # column of the same row; remembering the last input makes that a single urlparse per row.
+    last_value: object = _UNPARSED
+    last_host: str | None = None
+
+    def url_host(value: object) -> str | None:
+        nonlocal last_value, last_host
+        if value != last_value:
+            last_host = _url_host(str(value)) if value is not None else None
+            last_value = value
+        return last_host
+
+    return url_host
+
+
+@lru_cache(maxsize=64)
+def _host_filter_text(column: str, n_hosts: int) -> str:
+    # The SQL only depends on the number of hosts, so repeat calls reuse the same string (and
+    # sqlite's prepared statement for it).
+    contains = " or ".join(f"instr(lower({column}), ?)" for _ in range(n_hosts))
+    return (
+        f" and ({contains} or {column} glob '*[^ -~]*')"
+        f" and url_host({column}) in ({', '.join('?' * n_hosts)})"
+    )
+
+
+def _host_filter_sql(column: str, hosts: list[str]) -> tuple[str, list[object]]:
+    # `url_host` is a Python callback, so it is guarded by a C-level prefilter: a URL's host
+    # is a substring of it, so the lowercased link contains the (already lowercased) host for
+    # every match. instr/lower rather than LIKE, which a caller's connection may have made
+    # case-sensitive (`pragma case_sensitive_like`). sqlite's lower() only folds ASCII, so rows
+    # with characters outside printable ASCII (where str.lower() or urlparse's tab stripping
+    # could differ) always reach the exact check.
+    return _host_filter_text(column, len(hosts)), [*hosts, *hosts]
+
+
+def _document_row(data: dict[str, object], url: object) -> VaticanSqliteDocumentRow:
+    categories = _safe_json_loads(data.get("categories_json"))
+    if isinstance(categories, list):
+        categories = [str(c).strip() for c in categories if c is not None and str(c).strip()]
+    return VaticanSqliteDocumentRow(
+        row_id=str(data.get("id")),
+        url=str(url),
+        title=(str(data["title"]) if data.get("title") else None),
+        short_title=(str(data["short_title"]) if data.get("short_title") else None),
+        year=(int(data["year"]) if data.get("year") is not None else None),
+        display_year=(str(data["display_year"]) if data.get("display_year") else None),
+        author=(str(data["author"]) if data.get("author") else None),
+        publisher=(str(data["publisher"]) if data.get("publisher") else None),
+        bibliography=(str(data["bibliography"]) if data.get("bibliography") else None),
+        language=(str(data["language"]) if data.get("language") else None),
+        categories=categories if isinstance(categories, list) else None,
+        raw_json_text=data.get("raw_json"),
+    )
+
+
+def _row_partition(row_id: object, url: object, num_partitions: int) -> int:
+    try:
+        rid = int(str(row_id))
+        if rid >= 0:
+            return rid % num_partitions
+    except (TypeError, ValueError):
+        pass
+    # Must stay zlib's CRC-32 (not CRC-32C): switching polynomials would silently move rows
+    # between partitions for workers running different versions. Python 3 already returns
+    # an unsigned value, so no 0xFFFFFFFF mask is needed.
+    return zlib.crc32(str(url).encode("utf-8")) % num_partitions
+
+
+@lru_cache(maxsize=8)
+def _partition_filter_sql(id_col: str, url_col: str) -> str:
+    # Canonical non-negative integer ids are bucketed by the sqlite VM itself; anything else
+    # (text ids, negatives, oversized digit strings) defers to `_row_partition` so the
+    # assignment is identical to the Python rule.
+    return (
+        " and (case"
+        f" when typeof({id_col}) = 'integer' and {id_col} >= 0 then {id_col} % ?"
+        f" when typeof({id_col}) = 'text' and length({id_col}) between 1 and 18"
+        f" and {id_col} not glob '*[^0-9]*' then cast({id_col} as integer) % ?"
+        f" else row_partition({id_col}, {url_col}, ?) end) = ?"
+    )
+
+
+def _neyman_allocation(counts: dict[str, int], budget: int) -> dict[str, int]:
+    """
+    Split `budget` samples across hosts in proportion to sqrt(row count).
+
+    Largest-remainder rounding keeps the total at `budget` (unless hosts run out of rows);
+    every host with rows gets at least one sample and never more than it has, so a budget
+    smaller than the number of hosts is exceeded.
+    """
+    present = {h: n for h, n in counts.items() if n > 0}
+    if not present or budget <= 0:
+        return {}
+    weights = {h: math.sqrt(n) for h, n in present.items()}
+    total = sum(weights.values())
+    exact = {h: budget * w / total for h, w in weights.items()}
+    quota = {h: min(present[h], max(1, math.floor(x))) for h, x in exact.items()}
+    spare = budget - sum(quota.values())
+    # The one-sample floor can overshoot when many hosts are tiny; take it back from the hosts
+    # furthest above their exact share.
+    while spare < 0:
+        over = [h for h in quota if quota[h] > 1]
+        if not over:
+            break
+        h = max(over, key=lambda h: (quota[h] - exact[h], h))
+        quota[h] -= 1
+        spare += 1
+    # Hand out what is left by largest remainder; hosts capped at their row count pass their
+    # share on, so keep going round until the budget is spent or every host is exhausted.
+    order = sorted(present, key=lambda h: (exact[h] - math.floor(exact[h]), h), reverse=True)
+    while spare > 0:
+        room = [h for h in order if quota[h] < present[h]]
+        if not room:
+            break
+        for h in room[:spare]:
+            quota[h] += 1
+        spare -= min(spare, len(room))
+    return quota
+
+
 def discover_document_rows(
-    sqlite_path: str,
+    sqlite_path: str | sqlite3.Connection,
     *,
     limit: int | None = 100,
     hosts: list[str] | None = None,
     sample_per_host: int | None = None,
     partition_index: int | None = None,
     num_partitions: int | None = None,
+    allocation: Literal["equal", "neyman"] = "equal",
 ) -> list[VaticanSqliteDocumentRow]:
     """
     Vatican sqlite adapter.
 
     Expected schema (from the generator) is a `documents` table with rich fields:
-    id, title, year, author, link, language, categories_json, raw_json, etc.
+    id, title, year, author, link, language, categories_json, raw_json, etc. An optional
+    `host` column (the link's lowercased netloc) is used for host filtering when present.
 
     If the schema differs, fall back to a best-effort scan for a URL-like column.
+
+    `sqlite_path` may also be an open connection (e.g. an in-memory database); it is used
+    as-is, not locked, and left open.
+
+    With `sample_per_host`, `allocation="equal"` takes up to that many rows from every host;
+    `"neyman"` spreads the same total (`sample_per_host * len(hosts)`) in proportion to the
+    square root of each host's row count, so large hosts get more without starving small ones.
     """
     effective_limit = None if limit is None or int(limit) <= 0 else int(limit)
     normalized_hosts = _normalize_hosts(hosts)
     effective_sample_per_host = (
         int(sample_per_host) if sample_per_host is not None and int(sample_per_host) > 0 else None
     )
+    if allocation not in ("equal", "neyman"):
+        raise ValueError("allocation must be 'equal' or 'neyman'")
     if (partition_index is None) != (num_partitions is None):
         raise ValueError("partition_index and num_partitions must be set together (or both unset)")
     if num_partitions is not None:
@@ -108,22 +360,20 @@ def discover_document_rows(
         if partition_index < 0 or partition_index >= num_partitions:
             raise ValueError("partition_index must be within [0, num_partitions)")
 
-    def _partition_for_row(row: VaticanSqliteDocumentRow) -> int:
-        if num_partitions is None:
-            return 0
-        try:
-            rid = int(row.row_id)
-            if rid >= 0:
-                return rid % num_partitions
-        except (TypeError, ValueError):
-            pass
-        return (zlib.crc32(row.url.encode("utf-8")) & 0xFFFFFFFF) % num_partitions
+    connection: AbstractContextManager[sqlite3.Connection]
+    if isinstance(sqlite_path, sqlite3.Connection):
+        _register_functions(sqlite_path)
+        connection = nullcontext(sqlite_path)
+    else:
+        connection = _cached_ro(sqlite_path)
+    with connection as conn:
+        # A private cursor with plain tuple rows, whatever row_factory the connection has.
+        cur = conn.cursor()
+        cur.row_factory = None
+        schema = _table_schema(cur)
 
-    with sqlite3.connect(sqlite_path) as conn:
-        tables = _list_tables(conn)
-
-        if "documents" in tables:
-            cols = _table_columns(conn, "documents")
+        cols = schema.get("documents")
+        if cols:
             required = {"id", "link"}
             if required.issubset(set(cols)):
                 select_cols = [
@@ -142,86 +392,112 @@ def discover_document_rows(
                 ]
                 # Keep only columns that exist to avoid breaking if generator changes.
                 select_cols = [c for c in select_cols if c in cols]
-                sql = f"select {', '.join(select_cols)} from documents where link is not null"
-                rows = conn.execute(sql).fetchall()
+                select_sql = ", ".join(select_cols)
+                # Newer generators store the parsed (lowercased) host next to the link; use it
+                # as-is (and through its index, if any) instead of re-parsing every link.
+                host_expr = "host" if "host" in cols else "url_host(link)"
+                if normalized_hosts:
+                    # Carry the host computed by the filter back out, so sampling reuses it.
+                    select_sql += f", {host_expr} as _host"
+                from_sql = "from documents where link is not null"
+                params: list[object] = []
+                if normalized_hosts and host_expr == "host":
+                    from_sql += f" and host in ({', '.join('?' * len(normalized_hosts))})"
+                    params.extend(normalized_hosts)
+                elif normalized_hosts:
+                    host_sql, host_params = _host_filter_sql("link", normalized_hosts)
+                    from_sql += host_sql
+                    params.extend(host_params)
+                if num_partitions is not None:
+                    # Each worker materializes only its 1/N share instead of discarding the rest.
+                    from_sql += _partition_filter_sql("id", "link")
+                    params.extend((num_partitions, num_partitions, num_partitions, partition_index))
+                if normalized_hosts and effective_sample_per_host:
+                    # Per-host sampling in one statement: sqlite numbers each host's rows in
+                    # table order and drops everything past the quota, so only the sample
+                    # itself is handed to Python. Rows are taken in rowid (insertion) order, or
+                    # primary-key order for a WITHOUT ROWID table. With a stored host column, an
+                    # index on documents(host) is already keyed (host, rowid) in the first case,
+                    # so the window needs no separate sort.
+                    order_col = _row_id_column(cur, "documents")
+                    if allocation == "neyman":
+                        counts = dict(
+                            cur.execute(
+                                f"select {host_expr}, count(*) {from_sql} group by 1", params
+                            ).fetchall()
+                        )
+                        budget = effective_sample_per_host * len(set(normalized_hosts))
+                        quota = _neyman_allocation(counts, budget)
+                        if not quota:
+                            return []
+                        quota_sql = "case _host" + " when ? then ?" * len(quota) + " else 0 end"
+                        params.extend(x for item in quota.items() for x in item)
+                    else:
+                        quota_sql = "?"
+                        params.append(effective_sample_per_host)
+                    sql = (
+                        f"select * from (select {select_sql}, row_number() over"
+                        f" (partition by {host_expr} order by {order_col}) as rn {from_sql})"
+                        f" where rn <= {quota_sql}"
+                    )
+                    by_host: dict[str, list[VaticanSqliteDocumentRow]] = {
+                        h: [] for h in normalized_hosts
+                    }
+                    for r in cur.execute(sql, params):
+                        data = dict(zip(select_cols, r, strict=False))
+                        by_host[r[-2]].append(_document_row(data, data["link"]))
+                    sampled = [row for h in normalized_hosts for row in by_host[h]]
+                    return sampled[:effective_limit] if effective_limit is not None else sampled
+
+                # Stream the cursor: sqlite only steps as far as we read, so the common
+                # `limit=N` call touches N rows instead of materializing the whole table.
                 out: list[VaticanSqliteDocumentRow] = []
-                for r in rows:
-                    data = dict(zip(select_cols, r, strict=True))
+                for r in cur.execute(f"select {select_sql} {from_sql}", params):
+                    data = dict(zip(select_cols, r, strict=False))
                     url = data.get("link")
                     if not url:
                         continue
-                    if normalized_hosts:
-                        host = _url_host(str(url))
-                        if not host or host not in normalized_hosts:
-                            continue
-                    categories = _safe_json_loads(data.get("categories_json"))
-                    raw = _safe_json_loads(data.get("raw_json"))
-                    if isinstance(categories, list):
-                        categories = [str(c).strip() for c in categories if c is not None and str(c).strip()]
-                    out.append(
-                        VaticanSqliteDocumentRow(
-                            row_id=str(data.get("id")),
-                            url=str(url),
-                            title=(str(data["title"]) if data.get("title") else None),
-                            short_title=(str(data["short_title"]) if data.get("short_title") else None),
-                            year=(int(data["year"]) if data.get("year") is not None else None),
-                            display_year=(str(data["display_year"]) if data.get("display_year") else None),
-                            author=(str(data["author"]) if data.get("author") else None),
-                            publisher=(str(data["publisher"]) if data.get("publisher") else None),
-                            bibliography=(str(data["bibliography"]) if data.get("bibliography") else None),
-                            language=(str(data["language"]) if data.get("language") else None),
-                            categories=categories if isinstance(categories, list) else None,
-                            raw_json=raw if isinstance(raw, dict) else None,
-                        )
-                    )
-                if num_partitions is not None:
-                    out = [row for row in out if _partition_for_row(row) == partition_index]
-                if not normalized_hosts:
-                    return out[:effective_limit] if effective_limit is not None else out
-                if not effective_sample_per_host:
-                    return out[:effective_limit] if effective_limit is not None else out
-                by_host: dict[str, list[VaticanSqliteDocumentRow]] = {h: [] for h in normalized_hosts}
-                for row in out:
-                    host = _url_host(row.url)
-                    if not host:
-                        continue
-                    if host in by_host:
-                        by_host[host].append(row)
-                sampled: list[VaticanSqliteDocumentRow] = []
-                for h in normalized_hosts:
-                    sampled.extend(by_host.get(h, [])[:effective_sample_per_host])
-                if num_partitions is not None:
-                    sampled = [row for row in sampled if _partition_for_row(row) == partition_index]
-                return sampled[:effective_limit] if effective_limit is not None else sampled
+                    out.append(_document_row(data, url))
+                    if effective_limit is not None and len(out) >= effective_limit:
+                        break
+                return out
 
         # Fallback: find the first table containing a URL-like column and return up to `limit` rows.
-        for table in tables:
-            cols = _table_columns(conn, table)
-            url_cols = [c for c in cols if "url" in c.lower() or "link" in c.lower()]
-            if not url_cols:
+        for table, table_cols in schema.items():
+            url_col = next((c for c in table_cols if _URL_COLUMN(c)), None)
+            if url_col is None:
                 continue
-            url_col = url_cols[0]
-            id_col = cols[0]
+            id_col = _row_id_column(cur, table)
             sql = f"select {id_col}, {url_col} from {table} where {url_col} is not null"
-            rows = conn.execute(sql).fetchall()
+            fallback_params: list[object] = []
+            if normalized_hosts:
+                host_sql, fallback_params = _host_filter_sql(url_col, normalized_hosts)
+                sql += host_sql
             out: list[VaticanSqliteDocumentRow] = []
-            for rid, url in rows:
+            found = False
+            for rid, url in cur.execute(sql, fallback_params):
                 if not url:
                     continue
-                if normalized_hosts:
-                    host = _url_host(str(url))
-                    if not host or host not in normalized_hosts:
-                        continue
-                out.append(VaticanSqliteDocumentRow(row_id=str(rid), url=str(url)))
-            if out:
-                if num_partitions is not None:
-                    out = [row for row in out if _partition_for_row(row) == partition_index]
-                return out[:effective_limit] if effective_limit is not None else out
+                # The first table with any URL rows wins, even if none land in this partition.
+                found = True
+                row = VaticanSqliteDocumentRow(row_id=str(rid), url=str(url))
+                if (
+                    num_partitions is not None
+                    and _row_partition(row.row_id, row.url, num_partitions) != partition_index
+                ):
+                    continue
+                out.append(row)
+                if effective_limit is not None and len(out) >= effective_limit:
+                    break
+            if found:
+                return out
 
     return []
 
 
-def discover_url_rows(sqlite_path: str, *, limit: int = 100) -> list[VaticanSqliteDocumentRow]:
+def discover_url_rows(
+    sqlite_path: str | sqlite3.Connection, *, limit: int = 100
+) -> list[VaticanSqliteDocumentRow]:
     """
     Backwards-compatible helper: returns Vatican rows that always have at least (row_id, url).
     Prefer `discover_document_rows` for richer metadata.
@@ -1,11 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import io
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
+from functools import lru_cache
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Concurrent per-key deletes issued by `delete_prefix`; the connection pool is sized above it.
+_DELETE_CONCURRENCY = 16
+_MAX_POOL_CONNECTIONS = 64
+# Upper bound on deletes queued ahead of the workers while the listing is still streaming.
+_DELETE_MAX_PENDING = 1000
+_DEFAULT_PART_SIZE = 8 * 1024 * 1024
+_DEFAULT_MAX_CONCURRENCY = 8
+# Shard boundaries for parallel listings; keys derived from hex digests spread evenly over these.
+_HEX_DIGITS = "0123456789abcdef"
+# Read size used when feeding multipart uploads; boto3's 256 KiB default means many tiny reads.
+_UPLOAD_IO_CHUNKSIZE = 1024 * 1024
+# Keys per ListObjectsV2 page; one page costs about as much as one HeadObject request.
+_LIST_PAGE_SIZE = 1000
+
 
 def parse_s3_uri(uri: str) -> tuple[str, str]:
     if not uri.startswith("s3://"):
@@ -28,17 +49,52 @@ class S3Config:
     region: str = "us-east-1"
 
 
+def _content_range_total(value: str | None) -> int | None:
+    # "bytes 0-8388607/123456789" -> 123456789
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+@lru_cache(maxsize=16)
+def _build_s3_client(endpoint: str, access_key: str, secret_key: str, region: str):
+    # botocore clients are thread-safe and expensive to build (endpoint data, serializers, a
+    # connection pool each), so S3Client instances with the same credentials share one. A
+    # fresh Session is used because boto3's default session is not safe to build clients from
+    # concurrently.
+    return boto3.session.Session().client(
+        "s3",
+        endpoint_url=endpoint,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name=region,
+        config=Config(
+            s3={"addressing_style": "path"},
+            max_pool_connections=_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            retries={"mode": "adaptive", "max_attempts": 5},
+        ),
+    )
+
+
 class S3Client:
-    def __init__(self, cfg: S3Config):
+    def __init__(
+        self,
+        cfg: S3Config,
+        *,
+        part_size: int = _DEFAULT_PART_SIZE,
+        max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+    ):
+        if part_size <= 0:
+            raise ValueError("part_size must be > 0")
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be > 0")
         self._cfg = cfg
-        self._client = boto3.client(
-            "s3",
-            endpoint_url=cfg.endpoint,
-            aws_access_key_id=cfg.access_key,
-            aws_secret_access_key=cfg.secret_key,
-            region_name=cfg.region,
-            config=Config(s3={"addressing_style": "path"}),
-        )
+        self._uri_prefix = f"s3://{cfg.bucket}/"
+        self._part_size = part_size
+        self._max_concurrency = max_concurrency
+        self._client = _build_s3_client(cfg.endpoint, cfg.access_key, cfg.secret_key, cfg.region)
 
     @property
     def bucket(self) -> str:
@@ -51,15 +107,101 @@ class S3Client:
         except Exception:  # noqa: BLE001
             return False
 
+    def head_many(self, keys: Iterable[str]) -> dict[str, bool]:
+        """
+        Existence check for many keys, answered from one listing of their common prefix.
+
+        Listing returns up to 1000 keys per request, so this replaces a HeadObject round trip
+        per key. Only the range between the smallest and largest wanted key is listed, and once
+        the listing has cost as many pages as there are keys, whatever it has not reached yet
+        is checked with `head` instead. Without a shared prefix it falls back to `head` per key
+        rather than listing the whole bucket.
+        """
+        wanted = list(dict.fromkeys(keys))
+        if not wanted:
+            return {}
+        prefix = os.path.commonprefix(wanted)
+        if not prefix:
+            return {k: self.head(k) for k in wanted}
+        wanted_set = set(wanted)
+        lowest, highest = min(wanted), max(wanted)
+        budget = _LIST_PAGE_SIZE * len(wanted)
+        # Only wanted keys are kept, so memory is bounded by the request, not the listing.
+        existing: set[str] = set()
+        listed = 0
+        last = lowest
+        # `lowest[:-1]` sorts just before `lowest`, so StartAfter skips everything below it.
+        for k in self._iter_keys(prefix, start_after=lowest[:-1] or None, stop_after=highest):
+            if k in wanted_set:
+                existing.add(k)
+            last = k
+            listed += 1
+            if listed >= budget:
+                break
+        else:
+            last = highest
+        for k in wanted:
+            if k > last and self.head(k):
+                existing.add(k)
+        return {k: k in existing for k in wanted}
+
     def get_bytes(self, key: str) -> bytes:
-        obj = self._client.get_object(Bucket=self._cfg.bucket, Key=key)
-        return obj["Body"].read()
+        """
+        Fetch an object, using concurrent ranged GETs when it is larger than `part_size`.
 
-    def get_bytes_uri(self, uri: str) -> bytes:
+        The first part is requested as a range so small objects still cost a single request;
+        its Content-Range reveals the total size, and any remaining parts are fetched in
+        parallel (pinned to the first part's ETag) and joined in order.
+        """
+        part_size = self._part_size
+        try:
+            first = self._client.get_object(
+                Bucket=self._cfg.bucket, Key=key, Range=f"bytes=0-{part_size - 1}"
+            )
+        except ClientError as e:
+            code = (e.response or {}).get("Error", {}).get("Code")
+            if code != "InvalidRange":
+                raise
+            # Zero-length objects reject every byte range.
+            obj = self._client.get_object(Bucket=self._cfg.bucket, Key=key)
+            return obj["Body"].read()
+
+        head = first["Body"].read()
+        total = _content_range_total(first.get("ContentRange"))
+        if total is None or total <= len(head):
+            return head
+
+        etag = first.get("ETag")
+        extra = {"IfMatch": etag} if etag else {}
+
+        def _fetch(lo: int) -> bytes:
+            hi = min(lo + part_size, total) - 1
+            obj = self._client.get_object(
+                Bucket=self._cfg.bucket, Key=key, Range=f"bytes={lo}-{hi}", **extra
+            )
+            return obj["Body"].read()
+
+        offsets = range(len(head), total, part_size)
+        with ThreadPoolExecutor(max_workers=min(self._max_concurrency, len(offsets))) as pool:
+            parts = list(pool.map(_fetch, offsets))
+        data = b"".join([head, *parts])
+        if len(data) != total:
+            raise RuntimeError(
+                f"Short read for s3://{self._cfg.bucket}/{key}: {len(data)} != {total} bytes"
+            )
+        return data
+
+    def _key_for_uri(self, uri: str) -> str:
+        # Same-bucket URIs (the normal case) skip the full parse.
+        if uri.startswith(self._uri_prefix) and len(uri) > len(self._uri_prefix):
+            return uri[len(self._uri_prefix) :]
         bucket, key = parse_s3_uri(uri)
         if bucket != self._cfg.bucket:
             raise ValueError(f"Bucket mismatch for URI: {uri}")
-        return self.get_bytes(key)
+        return key
+
+    def get_bytes_uri(self, uri: str) -> bytes:
+        return self.get_bytes(self._key_for_uri(uri))
 
     def put_bytes(
         self,
@@ -71,8 +213,24 @@ class S3Client:
         extra: dict = {}
         if content_type:
             extra["ContentType"] = content_type
-        self._client.put_object(Bucket=self._cfg.bucket, Key=key, Body=data, **extra)
-        return f"s3://{self._cfg.bucket}/{key}"
+        if len(data) >= self._part_size:
+            # Large payloads go up as concurrent multipart parts instead of one PUT stream.
+            self._client.upload_fileobj(
+                io.BytesIO(data),
+                self._cfg.bucket,
+                key,
+                ExtraArgs=extra or None,
+                Config=TransferConfig(
+                    multipart_threshold=self._part_size,
+                    multipart_chunksize=self._part_size,
+                    max_concurrency=self._max_concurrency,
+                    io_chunksize=_UPLOAD_IO_CHUNKSIZE,
+                    use_threads=True,
+                ),
+            )
+        else:
+            self._client.put_object(Bucket=self._cfg.bucket, Key=key, Body=data, **extra)
+        return self._uri_prefix + key
 
     def delete_key(self, key: str) -> None:
         # AWS S3 delete_object is idempotent; MinIO behaves similarly. Treat missing keys as ok.
@@ -86,34 +244,81 @@ class S3Client:
             raise
 
     def delete_uri(self, uri: str) -> None:
-        bucket, key = parse_s3_uri(uri)
-        if bucket != self._cfg.bucket:
-            raise ValueError(f"Bucket mismatch for URI: {uri}")
-        self.delete_key(key)
+        self.delete_key(self._key_for_uri(uri))
 
-    def list_keys(self, *, prefix: str) -> list[str]:
+    def _iter_keys(
+        self, prefix: str, *, start_after: str | None = None, stop_after: str | None = None
+    ) -> Iterator[str]:
+        # Keys come back in UTF-8 byte order, which matches str ordering, so the range
+        # (start_after, stop_after] can be cut off as soon as it is passed.
         paginator = self._client.get_paginator("list_objects_v2")
-        keys: list[str] = []
-        for page in paginator.paginate(Bucket=self._cfg.bucket, Prefix=prefix):
+        extra = {"StartAfter": start_after} if start_after else {}
+        for page in paginator.paginate(Bucket=self._cfg.bucket, Prefix=prefix, **extra):
             for obj in page.get("Contents") or []:
                 k = obj.get("Key")
-                if isinstance(k, str) and k:
-                    keys.append(k)
-        return keys
+                if not isinstance(k, str) or not k:
+                    continue
+                if stop_after is not None and k > stop_after:
+                    return
+                yield k
+
+    def list_keys_iter(self, *, prefix: str) -> Iterator[str]:
+        """
+        Stream keys under `prefix` page by page, without holding the whole listing in memory.
+        """
+        return self._iter_keys(prefix)
+
+    def list_keys(self, *, prefix: str, shards: int = 1) -> list[str]:
+        """
+        List keys under `prefix`, optionally as `shards` concurrent range listings.
+
+        Shards split the key space at `prefix` + hex digit (up to 16), using StartAfter so every
+        key falls in exactly one range whatever its first character; results stay sorted.
+        """
+        if shards <= 0:
+            raise ValueError("shards must be > 0")
+        shards = min(shards, len(_HEX_DIGITS))
+        if shards == 1:
+            return list(self.list_keys_iter(prefix=prefix))
+        bounds = [prefix + _HEX_DIGITS[i * len(_HEX_DIGITS) // shards] for i in range(1, shards)]
+        ranges = list(zip([None, *bounds], [*bounds, None], strict=True))
+        with ThreadPoolExecutor(max_workers=min(shards, self._max_concurrency)) as pool:
+            parts = pool.map(
+                lambda r: list(self._iter_keys(prefix, start_after=r[0], stop_after=r[1])), ranges
+            )
+            return [k for part in parts for k in part]
 
     def delete_prefix(self, *, prefix: str) -> int:
         """
         Delete all objects under `prefix`. Returns number of keys attempted.
-        """
-        keys = self.list_keys(prefix=prefix)
-        if not keys:
-            return 0
 
-        deleted = 0
+        Keys are deleted concurrently as listing pages arrive, so neither the full key list nor
+        one round trip per key in series is needed.
+        """
         # Prefer per-object deletes for broad compatibility with S3 gateways.
         # Some S3-compatible deployments (seen with MinIO behind certain proxies)
         # can reject `DeleteObjects` without an explicit Content-MD5 header.
-        for k in keys:
-            self.delete_key(k)
-            deleted += 1
+        deleted = 0
+        pending: set[Future[None]] = set()
+        with ThreadPoolExecutor(max_workers=_DELETE_CONCURRENCY) as pool:
+            try:
+                for k in self.list_keys_iter(prefix=prefix):
+                    pending.add(pool.submit(self.delete_key, k))
+                    if len(pending) >= _DELETE_MAX_PENDING:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for f in done:
+                            f.result()
+                            deleted += 1
+                for f in pending:
+                    f.result()
+                    deleted += 1
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
         return deleted
+
+    async def delete_prefix_async(self, *, prefix: str) -> int:
+        """
+        `delete_prefix` for callers running inside an event loop; the loop is not blocked.
+        """
+        return await asyncio.to_thread(self.delete_prefix, prefix=prefix)
@@ -1,16 +1,64 @@
 from __future__ import annotations
 
 import hashlib
+import json
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Bound once: these are the OpenSSL-backed constructors (SHA-NI accelerated on CPUs that have it).
+_sha256 = hashlib.sha256
+_sha1 = hashlib.sha1
+
+# Every byte except ASCII letters: deleting these leaves exactly the [A-Za-z] characters, so
+# counting letters is one C-level translate pass with no per-match allocations.
+_NON_ASCII_ALPHA = bytes(b for b in range(256) if not (0x41 <= b <= 0x5A or 0x61 <= b <= 0x7A))
 
 
 def sha256_bytes(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+    return _sha256(data).hexdigest()
+
+
+def sha256_many(datas: Iterable[bytes], *, max_workers: int | None = None) -> list[str]:
+    """
+    Hex SHA-256 digests for many payloads, in input order.
+
+    hashlib releases the GIL while hashing buffers larger than 2 KiB, so large payloads are
+    hashed in parallel across cores.
+    """
+    items = list(datas)
+    if len(items) < 2:
+        return [sha256_bytes(d) for d in items]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(sha256_bytes, items))
+
+
+def count_ascii_alpha(text: str | bytes) -> int:
+    """
+    Number of ASCII letters in `text`; bytes are counted as-is (non-ASCII bytes never match).
+    """
+    data = text.encode("ascii", "ignore") if isinstance(text, str) else text
+    return len(data.translate(None, _NON_ASCII_ALPHA))
 
 
 def stable_document_id(source: str, source_uri: str) -> str:
     """
     Deterministic document_id derived from the source URI.
     """
-    digest = hashlib.sha1(source_uri.encode("utf-8")).hexdigest()  # noqa: S324
+    digest = _sha1(source_uri.encode("utf-8")).hexdigest()  # noqa: S324
     return f"{source}:{digest}"
 
+
+def json_loads(data: bytes | str) -> Any:
+    """
+    Parse JSON with orjson when installed (accepts bytes without a utf-8 decode step),
+    falling back to the stdlib. Both raise `json.JSONDecodeError` on invalid input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
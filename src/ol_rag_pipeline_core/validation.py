@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import re
 from dataclasses import dataclass
 
+from ol_rag_pipeline_core.util import count_ascii_alpha
+
 
 @dataclass(frozen=True)
 class ValidationIssue:
@@ -11,16 +12,20 @@ class ValidationIssue:
     details: dict[str, object] | None = None
 
 
-_ALPHA_RE = re.compile(r"[A-Za-z]")
-
-
 def validate_extracted_text(
     *,
     text: str,
     content_type: str | None,
     min_chars: int = 200,
     min_alpha_ratio: float = 0.15,
+    short_circuit_on_too_short: bool = True,
 ) -> list[ValidationIssue]:
+    """
+    Flag extracted text that is empty, too short, or mostly non-alphabetic.
+
+    With `short_circuit_on_too_short` (the default), text already flagged as too short is not
+    scanned for its alphabetic ratio; pass False to get both issues.
+    """
     issues: list[ValidationIssue] = []
 
     normalized = (text or "").strip()
@@ -28,17 +33,20 @@ def validate_extracted_text(
         issues.append(ValidationIssue(code="extraction_empty", message="Extracted text is empty."))
         return issues
 
-    if len(normalized) < min_chars:
+    chars = len(normalized)
+    if chars < min_chars:
         issues.append(
             ValidationIssue(
                 code="extraction_too_short",
                 message="Extracted text is too short.",
-                details={"chars": len(normalized), "min_chars": min_chars},
+                details={"chars": chars, "min_chars": min_chars},
             )
         )
+        if short_circuit_on_too_short:
+            return issues
 
-    alpha = len(_ALPHA_RE.findall(normalized))
-    alpha_ratio = alpha / max(len(normalized), 1)
+    alpha = count_ascii_alpha(normalized)
+    alpha_ratio = alpha / chars
     if alpha_ratio < min_alpha_ratio:
         issues.append(
             ValidationIssue(
@@ -1,30 +1,78 @@
 from __future__ import annotations
 
+import importlib.util
+import itertools
+import re
 import time
-from dataclasses import dataclass
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Protocol
 import os
-from urllib.parse import urlparse
 
 import httpx
 
+from ol_rag_pipeline_core.util import json_loads
+
 
 class VpnError(RuntimeError):
     pass
 
 
+# We intentionally use external probe URLs (default: ipinfo.io first) as a fallback because
+# Gluetun's `/v1/publicip/ip` can be empty depending on DNS mode and internal settings.
+_PROBE_URLS = (
+    # Common plain-text IP endpoints.
+    "https://ipinfo.io/ip",
+    "https://api.ipify.org",
+    "https://ifconfig.co/ip",
+    "https://icanhazip.com",
+    # Cloudflare trace: includes a line like `ip=1.2.3.4`
+    "https://cloudflare.com/cdn-cgi/trace",
+)
+_PROXY_ENV_VARS = ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY")
+_OPENVPN_STATUSES = frozenset({"running", "stopped"})
+
+
+def _probe_url(client: httpx.Client, url: str) -> bool:
+    try:
+        r = client.get(url)
+        if r.status_code >= 400:
+            return False
+        text = (r.text or "").strip()
+        if not text:
+            return False
+        if "cdn-cgi/trace" in url:
+            for line in text.splitlines():
+                if line.startswith("ip="):
+                    ip = line.split("=", 1)[1].strip()
+                    return bool(ip) and any(ch.isdigit() for ch in ip)
+            return False
+        return any(ch.isdigit() for ch in text)
+    except Exception:  # noqa: BLE001
+        return False
+
+
+# Scheme, optional userinfo, then the host (bracketed IPv6 or up to the port/path).
+_URL_HOST_RE = re.compile(r"https?://(?:[^/?#@]*@)?(\[[^\]/?#]*\]|[^/:?#]*)", re.IGNORECASE)
+_INTERNAL_HOSTS = frozenset({"localhost", "127.0.0.1"})
+_INTERNAL_HOST_SUFFIXES = (".svc", ".svc.cluster.local")
+
+
+@lru_cache(maxsize=4096)
 def is_probably_external_url(url: str) -> bool:
-    parsed = urlparse(url)
-    if parsed.scheme not in {"http", "https"}:
+    # Called before every outbound request, so this avoids a full urlparse; the result only
+    # depends on the URL, so retries and polled endpoints are answered from the cache.
+    m = _URL_HOST_RE.match(url)
+    if not m:
         return False
-    host = (parsed.hostname or "").lower()
+    host = m.group(1).strip("[]").lower()
     if not host:
         return False
-    if host in {"localhost", "127.0.0.1"}:
-        return False
-    if host.endswith(".svc") or host.endswith(".svc.cluster.local"):
+    if host in _INTERNAL_HOSTS:
         return False
-    return True
+    return not host.endswith(_INTERNAL_HOST_SUFFIXES)
 
 
 class GluetunControl(Protocol):
@@ -43,6 +91,9 @@ class GluetunConfig:
 class GluetunHttpControlClient:
     def __init__(self, cfg: GluetunConfig):
         self._cfg = cfg
+        # One pooled client for the lifetime of the control client: status checks run on the
+        # request hot path, and a fresh client per call pays a new TCP handshake every time.
+        self._http = self._client()
 
     def _client(self) -> httpx.Client:
         headers: dict[str, str] = {}
@@ -54,31 +105,35 @@ class GluetunHttpControlClient:
             headers=headers,
             follow_redirects=True,
             trust_env=False,
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
         )
 
+    def close(self) -> None:
+        self._http.close()
+
     def openvpn_status(self) -> str:
-        with self._client() as client:
-            r = client.get("/v1/openvpn/status")
-            r.raise_for_status()
-            data = r.json()
-        status = str(data.get("status") or "").lower()
-        if status not in {"running", "stopped"}:
-            raise VpnError(f"Unexpected Gluetun status payload: {data}")
+        r = self._http.get("/v1/openvpn/status")
+        r.raise_for_status()
+        data = json_loads(r.content)
+        status = data.get("status")
+        # Gluetun answers in lowercase; only normalize when it doesn't.
+        if not isinstance(status, str) or status not in _OPENVPN_STATUSES:
+            status = str(status or "").lower()
+            if status not in _OPENVPN_STATUSES:
+                raise VpnError(f"Unexpected Gluetun status payload: {data}")
         return status
 
     def set_openvpn_status(self, status: str) -> None:
-        desired = status.lower()
-        if desired not in {"running", "stopped"}:
+        desired = status if status in _OPENVPN_STATUSES else status.lower()
+        if desired not in _OPENVPN_STATUSES:
             raise ValueError("status must be 'running' or 'stopped'")
-        with self._client() as client:
-            r = client.put("/v1/openvpn/status", json={"status": desired})
-            r.raise_for_status()
+        r = self._http.put("/v1/openvpn/status", json={"status": desired})
+        r.raise_for_status()
 
     def public_ip(self) -> str | None:
-        with self._client() as client:
-            r = client.get("/v1/publicip/ip")
-            r.raise_for_status()
-            data = r.json()
+        r = self._http.get("/v1/publicip/ip")
+        r.raise_for_status()
+        data = json_loads(r.content)
         if isinstance(data, str):
             ip = data.strip()
             return ip or None
@@ -88,6 +143,16 @@ class GluetunHttpControlClient:
         return None
 
 
+def _is_rotation_point(count: int, rotate_every: int) -> bool:
+    if rotate_every <= 0:
+        return False
+    mask = rotate_every - 1
+    if rotate_every & mask == 0:
+        # Power-of-two intervals (the usual 8/16/64 configs) avoid the division.
+        return count & mask == 0
+    return count % rotate_every == 0
+
+
 @dataclass
 class VpnRotationGuard:
     gluetun: GluetunControl | None = None
@@ -105,9 +170,14 @@ class VpnRotationGuard:
     # we double the number of outbound calls and slow the crawl dramatically.
     status_cache_ttl_s: float = 30.0
 
-    _external_request_count: int = 0
+    # Numbers external requests from 1; next() on it is the per-request increment.
+    _external_requests: itertools.count = field(
+        default_factory=lambda: itertools.count(1), repr=False, compare=False
+    )
     _proxy_index: int = 0
     _last_ok_monotonic: float = 0.0
+    _probe_client: httpx.Client | None = None
+    _probe_client_env: tuple[str | None, ...] | None = None
 
     def _apply_proxy_env(self, proxy_url: str | None) -> None:
         if not proxy_url:
@@ -126,48 +196,52 @@ class VpnRotationGuard:
             return False
         return (time.monotonic() - self._last_ok_monotonic) < self.status_cache_ttl_s
 
+    def _invalidate_status_cache(self) -> None:
+        # A rotation changes the egress, so the next ensure_vpn_running must check it again
+        # instead of trusting the health check made before the switch.
+        self._last_ok_monotonic = 0.0
+
     def _rotate_proxy_once(self) -> str:
         assert self.proxy_pool
+        self._invalidate_status_cache()
         self._proxy_index = (self._proxy_index + 1) % len(self.proxy_pool)
         proxy = self.proxy_pool[self._proxy_index]
         self._apply_proxy_env(proxy)
         return proxy
 
+    def _get_probe_client(self) -> httpx.Client:
+        # The probe client picks up the egress proxy from the environment (trust_env), so it is
+        # rebuilt whenever proxy rotation has changed those variables.
+        env = tuple(os.environ.get(k) for k in _PROXY_ENV_VARS)
+        if self._probe_client is None or self._probe_client_env != env:
+            if self._probe_client is not None:
+                self._probe_client.close()
+            self._probe_client = httpx.Client(
+                timeout=5.0,
+                follow_redirects=True,
+                http2=importlib.util.find_spec("h2") is not None,
+            )
+            self._probe_client_env = env
+        return self._probe_client
+
     def _probe_external_connectivity(self) -> bool:
         """
         Verify external connectivity through the pod's configured egress.
 
-        We intentionally use an external probe URL (default: ipinfo.io) as a fallback because
-        Gluetun's `/v1/publicip/ip` can be empty depending on DNS mode and internal settings.
+        All probe URLs are requested concurrently and the first usable answer wins, so a
+        failing probe costs one timeout rather than one per endpoint.
         """
-        probe_urls = [
-            # Common plain-text IP endpoints.
-            "https://ipinfo.io/ip",
-            "https://api.ipify.org",
-            "https://ifconfig.co/ip",
-            "https://icanhazip.com",
-            # Cloudflare trace: includes a line like `ip=1.2.3.4`
-            "https://cloudflare.com/cdn-cgi/trace",
-        ]
-        with httpx.Client(timeout=5.0, follow_redirects=True) as client:
-            for url in probe_urls:
-                try:
-                    r = client.get(url)
-                    if r.status_code >= 400:
-                        continue
-                    text = (r.text or "").strip()
-                    if not text:
-                        continue
-                    if "cdn-cgi/trace" in url:
-                        for line in text.splitlines():
-                            if line.startswith("ip="):
-                                ip = line.split("=", 1)[1].strip()
-                                return bool(ip) and any(ch.isdigit() for ch in ip)
-                        continue
-                    return any(ch.isdigit() for ch in text)
-                except Exception:  # noqa: BLE001
-                    continue
-        return False
+        client = self._get_probe_client()
+        pool = ThreadPoolExecutor(max_workers=len(_PROBE_URLS))
+        try:
+            futures = [pool.submit(_probe_url, client, url) for url in _PROBE_URLS]
+            for f in as_completed(futures):
+                if f.result():
+                    return True
+            return False
+        finally:
+            # Don't wait for slower probes once one has succeeded.
+            pool.shutdown(wait=False, cancel_futures=True)
 
     def ensure_vpn_running(self) -> None:
         if self._is_cache_fresh():
@@ -270,6 +344,7 @@ class VpnRotationGuard:
         # Force a new server selection by cycling OpenVPN.
         if not self.gluetun:
             raise VpnError("rotate_vpn requires a Gluetun control client or a proxy pool")
+        self._invalidate_status_cache()
         self.gluetun.set_openvpn_status("stopped")
         # Some providers keep status="running" briefly; just wait until it isn't running anymore.
         deadline = time.monotonic() + self.ensure_timeout_s
@@ -286,14 +361,42 @@ class VpnRotationGuard:
         if not is_probably_external_url(url):
             return False
 
-        if self.require_vpn_for_external:
+        # Checked here as well as in ensure_vpn_running so the common case (a recent healthy
+        # check) costs one clock read; the request still counts towards rotation.
+        if self.require_vpn_for_external and not self._is_cache_fresh():
             self.ensure_vpn_running()
 
-        self._external_request_count += 1
-        rotate_every = self.rotate_every_n_requests
-        if self.proxy_pool and len(self.proxy_pool) <= 1:
-            rotate_every = 0
-        if rotate_every > 0 and self._external_request_count % rotate_every == 0:
+        if _is_rotation_point(next(self._external_requests), self._rotate_every()):
             self.rotate_vpn()
             return True
         return False
+
+    def before_requests_batch(self, urls: Iterable[str]) -> list[bool]:
+        """
+        `before_request` for a batch of URLs about to be issued together.
+
+        The VPN is checked at most once and rotated at most once for the whole batch. The
+        result marks the same positions that per-URL calls would have rotated at.
+        """
+        external = [is_probably_external_url(url) for url in urls]
+        if not any(external):
+            return external
+
+        if self.require_vpn_for_external and not self._is_cache_fresh():
+            self.ensure_vpn_running()
+
+        rotate_every = self._rotate_every()
+        rotations: list[bool] = []
+        for is_external in external:
+            if is_external:
+                rotations.append(_is_rotation_point(next(self._external_requests), rotate_every))
+            else:
+                rotations.append(False)
+        if any(rotations):
+            self.rotate_vpn()
+        return rotations
+
+    def _rotate_every(self) -> int:
+        if self.proxy_pool and len(self.proxy_pool) <= 1:
+            return 0
+        return self.rotate_every_n_requests
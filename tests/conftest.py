@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import sqlite3
 import uuid
 from collections.abc import Generator
 
@@ -21,15 +22,48 @@ def pg_dsn() -> str:
 
 @pytest.fixture(scope="session")
 def pg_schema(pg_dsn: str) -> Generator[str, None, None]:
+    # Migrations run once per session into a schema private to this process, so parallel
+    # (xdist) workers never apply DDL to the same schema and need no cross-process lock.
     schema = f"test_{uuid.uuid4().hex[:10]}"
     apply_migrations(pg_dsn, schema=schema)
     yield schema
     with psycopg.connect(pg_dsn) as conn:
-        conn.execute(f'drop schema if exists "{pg_schema}" cascade')
+        conn.execute(f'drop schema if exists "{schema}" cascade')
         conn.commit()
 
 
-@pytest.fixture()
-def conn(pg_dsn: str, pg_schema: str) -> Generator[psycopg.Connection, None, None]:
+@pytest.fixture(scope="session")
+def _session_conn(pg_dsn: str, pg_schema: str) -> Generator[psycopg.Connection, None, None]:
     with connect(pg_dsn, schema=pg_schema) as c:
         yield c
+
+
+@pytest.fixture()
+def conn(_session_conn: psycopg.Connection) -> Generator[psycopg.Connection, None, None]:
+    # One connection for the whole session. Repositories commit their own writes, so tests
+    # can't be isolated with savepoints; they use distinct document ids instead. Rolling back
+    # afterwards discards anything a failed test left uncommitted (or an aborted transaction).
+    yield _session_conn
+    _session_conn.rollback()
+
+
+@pytest.fixture(scope="session")
+def _sqlite_session_conn() -> Generator[sqlite3.Connection, None, None]:
+    # In-memory, so sqlite tests never touch the filesystem (no journal/-wal/-shm files).
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.execute("pragma temp_store=memory")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture()
+def sqlite_conn(
+    _sqlite_session_conn: sqlite3.Connection,
+) -> Generator[sqlite3.Connection, None, None]:
+    # Each test runs inside a savepoint, and sqlite DDL is transactional, so rolling back to
+    # it discards the test's tables and rows without re-creating the connection. Tests must
+    # not commit.
+    _sqlite_session_conn.execute("savepoint test_case")
+    yield _sqlite_session_conn
+    _sqlite_session_conn.execute("rollback to test_case")
+    _sqlite_session_conn.execute("release test_case")
@@ -39,8 +39,11 @@ def test_build_calibre_opf_contains_core_fields() -> None:
 
 def test_build_epub_is_valid_zip_with_mimetype_first() -> None:
     epub = build_epub_bytes(title="T", authors=["A"], language="en", body_text="Hello\n\nWorld")
-    z = zipfile.ZipFile(BytesIO(epub))
-    names = z.namelist()
-    assert names[0] == "mimetype"
-    assert z.read("mimetype") == b"application/epub+zip"
-    assert b"<html" in z.read("OEBPS/content.xhtml")
+    # OCF: the first local file header is an uncompressed "mimetype" entry with no extra
+    # field, so readers can sniff the media type at a fixed offset without unzipping.
+    assert epub[:4] == b"PK\x03\x04"
+    assert epub[8:10] == b"\x00\x00"  # ZIP_STORED
+    assert epub[28:30] == b"\x00\x00"  # extra field length
+    assert epub[30:38] == b"mimetype"
+    assert epub[38:58] == b"application/epub+zip"
+    assert b"<html" in zipfile.ZipFile(BytesIO(epub)).read("OEBPS/content.xhtml")
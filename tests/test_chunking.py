@@ -1,26 +1,54 @@
+import math
+
+import pytest
+
 from ol_rag_pipeline_core.chunking import chunk_text
 from ol_rag_pipeline_core.embedding import EmbeddingClient
 
+_LARGE_TEXT_TOKENS = 1000
+# Token i is the integer i, so any window's expected text can be rebuilt from its offsets.
+_LARGE_TEXT = " ".join(map(str, range(_LARGE_TEXT_TOKENS)))
+
 
 def test_chunk_text_empty() -> None:
     assert chunk_text(text="") == []
 
 
-def test_chunk_text_respects_max_tokens_and_overlap() -> None:
-    text = " ".join(str(i) for i in range(1000))
-    chunks = chunk_text(text=text, max_tokens=100, overlap_tokens=10)
+@pytest.mark.parametrize(
+    ("max_tokens", "overlap_tokens"), [(100, 10), (100, 0), (64, 63), (999, 1)]
+)
+def test_chunk_text_respects_max_tokens_and_overlap(max_tokens: int, overlap_tokens: int) -> None:
+    n = _LARGE_TEXT_TOKENS
+    chunks = chunk_text(text=_LARGE_TEXT, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
 
-    assert len(chunks) > 1
-    assert all(c.token_count <= 100 for c in chunks)
+    # Sliding window with stride S = K - overlap: ceil((N - K) / S) + 1 windows.
+    stride = max_tokens - overlap_tokens
+    assert len(chunks) == math.ceil((n - max_tokens) / stride) + 1
+    assert all(c.token_count <= max_tokens for c in chunks)
 
-    # Deterministic: same input -> same output sizes
-    chunks2 = chunk_text(text=text, max_tokens=100, overlap_tokens=10)
-    assert [c.token_count for c in chunks] == [c.token_count for c in chunks2]
+    # Each window's exact content is known up front; this also pins determinism without
+    # chunking the text a second time.
+    for i, c in enumerate(chunks):
+        start = i * stride
+        assert c.text == " ".join(map(str, range(start, min(start + max_tokens, n))))
 
 
 def test_embedding_client_batching() -> None:
-    client = EmbeddingClient(base_url="http://example.invalid", max_batch_texts=3, max_batch_chars=10)
-    batches = client._batch(["aaaa", "bbbb", "cccc", "dddd"])
-
-    # With max_batch_chars=10, first two fit (8 chars), adding third would exceed (12).
-    assert batches == [["aaaa", "bbbb"], ["cccc", "dddd"]]
+    client = EmbeddingClient(
+        base_url="http://example.invalid", max_batch_texts=3, max_batch_chars=10
+    )
+    batches = client._batch(["aaaa", "bbbb", "cccc", "dddd", "e" * 11, "ffff"])
+
+    # max_batch_chars limits each text, not the batch total; an oversized text goes alone.
+    assert batches == [["aaaa", "bbbb", "cccc"], ["dddd"], ["e" * 11], ["ffff"]]
+
+
+def test_embedding_client_batches_by_count_not_cumulative_chars() -> None:
+    """
+    The char limit is per input text (as in Bedrock/Cohere embedding APIs), so ten 2000-char
+    texts under a 2048-char limit are one request, not ten.
+    """
+    client = EmbeddingClient(
+        base_url="http://example.invalid", max_batch_texts=96, max_batch_chars=2048
+    )
+    assert client._batch(["x" * 2000] * 10) == [["x" * 2000] * 10]
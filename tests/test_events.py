@@ -1,12 +1,12 @@
 from datetime import UTC, datetime
-from uuid import uuid4
+from uuid import UUID
 
 from ol_rag_pipeline_core.events import DocsDiscoveredEvent, prefect_idempotency_key
 
 
 def test_idempotency_key_is_stable() -> None:
     ev = DocsDiscoveredEvent(
-        event_id=uuid4(),
+        event_id=UUID("00000000-0000-4000-8000-000000000001"),
         document_id="doc1",
         source="nextcloud",
         source_uri="https://example/doc1.pdf",
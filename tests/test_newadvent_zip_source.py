@@ -3,12 +3,15 @@ from __future__ import annotations
 import io
 import zipfile
 
+import pytest
+
 from ol_rag_pipeline_core.sources.newadvent_zip import iter_zip_entries
 
 
-def test_iter_zip_entries_skips_dotfiles_and_meta_refresh_stubs() -> None:
+@pytest.fixture(scope="module")
+def newadvent_zip_bytes() -> bytes:
     buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w") as zf:
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
         zf.writestr("bible/.DS_Store", b"nope")
         zf.writestr(
             "bible/1jo000.htm",
@@ -18,7 +21,10 @@ def test_iter_zip_entries_skips_dotfiles_and_meta_refresh_stubs() -> None:
             ),
         )
         zf.writestr("bible/1jo001.htm", b"<html><body><h1>OK</h1><p>Hello</p></body></html>")
+    return buf.getvalue()
+
 
-    entries = iter_zip_entries(buf.getvalue(), limit=50)
+def test_iter_zip_entries_skips_dotfiles_and_meta_refresh_stubs(newadvent_zip_bytes: bytes) -> None:
+    entries = iter_zip_entries(newadvent_zip_bytes, limit=50)
     assert [e.path for e in entries] == ["bible/1jo001.htm"]
     assert entries[0].content_type == "text/html"
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+
+import httpx
+import pytest
+
+from ol_rag_pipeline_core.sources import nextcloud
+from ol_rag_pipeline_core.sources.nextcloud import WebDavFile, iter_webdav_files
+
+_MULTISTATUS = b"""<?xml version="1.0"?>
+<d:multistatus xmlns:d="DAV:">
+  <d:response>
+    <d:href>/remote.php/dav/files/u/books/</d:href>
+    <d:propstat><d:prop><d:resourcetype><d:collection/></d:resourcetype></d:prop></d:propstat>
+  </d:response>
+  <d:response>
+    <d:href>/remote.php/dav/files/u/books/sub</d:href>
+    <d:propstat><d:prop><d:resourcetype><d:collection/></d:resourcetype></d:prop></d:propstat>
+  </d:response>
+  <d:response>
+    <d:href>/remote.php/dav/files/u/books/a.pdf</d:href>
+    <d:propstat><d:prop>
+      <d:resourcetype/>
+      <d:getetag>"e1"</d:getetag>
+      <d:getcontentlength>123456</d:getcontentlength>
+      <d:getcontenttype>application/pdf</d:getcontenttype>
+    </d:prop></d:propstat>
+  </d:response>
+  <d:response>
+    <d:href>/remote.php/dav/files/u/books/b.epub</d:href>
+    <d:propstat><d:prop>
+      <d:resourcetype/>
+      <d:getcontentlength>42</d:getcontentlength>
+    </d:prop></d:propstat>
+  </d:response>
+</d:multistatus>
+"""
+
+
+def test_iter_webdav_files_streams_chunked_multistatus(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Split inside the first getcontentlength value so it spans two chunks.
+    split = _MULTISTATUS.index(b"123456") + 3
+    last = _MULTISTATUS.index(b"<d:response>", split)
+    chunks = [_MULTISTATUS[:split], _MULTISTATUS[split:last], _MULTISTATUS[last:]]
+    served: list[int] = []
+    seen: dict[str, object] = {}
+
+    def body():
+        for i, chunk in enumerate(chunks):
+            served.append(i)
+            yield chunk
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["method"] = request.method
+        seen["url"] = str(request.url)
+        seen["depth"] = request.headers.get("Depth")
+        return httpx.Response(207, content=body())
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        nextcloud.httpx,
+        "Client",
+        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+    )
+
+    files = iter_webdav_files(
+        webdav_base_url="https://cloud.example.com/remote.php/dav/files/u",
+        folder_path="/books/",
+        username="u",
+        app_password="p",
+    )
+    first = next(files)
+    # Entries are yielded as they arrive, not after the whole listing is read.
+    assert served == [0, 1] and first.name == "a.pdf"
+    assert [first, *files] == [
+        WebDavFile(
+            href="/remote.php/dav/files/u/books/a.pdf",
+            etag='"e1"',
+            size=123456,
+            content_type="application/pdf",
+        ),
+        WebDavFile(
+            href="/remote.php/dav/files/u/books/b.epub", etag=None, size=42, content_type=None
+        ),
+    ]
+    assert seen == {
+        "method": "PROPFIND",
+        "url": "https://cloud.example.com/remote.php/dav/files/u/books/",
+        "depth": "1",
+    }
+
+
+def test_drain_responses_detaches_handled_entries_from_root() -> None:
+    parser = ET.XMLPullParser(events=("start", "end"))
+    parser.feed(_MULTISTATUS)
+    root = None
+    files = []
+    gen = nextcloud._drain_responses(parser, root)
+    while True:
+        try:
+            files.append(next(gen))
+        except StopIteration as stop:
+            root = stop.value
+            break
+    assert [f.name for f in files] == ["a.pdf", "b.epub"]
+    assert root is not None and root.tag == "{DAV:}multistatus"
+    assert len(root) == 0
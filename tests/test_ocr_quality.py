@@ -1,20 +1,45 @@
-from ol_rag_pipeline_core.ocr.quality import OcrQualityGate, assess_ocr_text_quality, passes_quality_gate
+from __future__ import annotations
 
+import pytest
 
-def test_assess_ocr_text_quality_empty() -> None:
-    r = assess_ocr_text_quality("")
-    assert r.looks_empty is True
-    assert r.chars == 0
+from ol_rag_pipeline_core.ocr.quality import (
+    OcrQualityGate,
+    assess_ocr_text_quality,
+    passes_quality_gate,
+)
 
 
-def test_passes_quality_gate_happy_path() -> None:
-    gate = OcrQualityGate(min_chars_per_page=5, min_alpha_ratio=0.2, min_printable_ratio=0.9)
-    r = assess_ocr_text_quality("Hello world")
-    assert passes_quality_gate(r, gate) is True
+@pytest.mark.parametrize(
+    ("text", "gate", "expected_chars", "expected_pass"),
+    [
+        pytest.param("", OcrQualityGate(), 0, False, id="empty"),
+        pytest.param(
+            "Hello world",
+            OcrQualityGate(min_chars_per_page=5, min_alpha_ratio=0.2, min_printable_ratio=0.9),
+            11,
+            True,
+            id="happy-path",
+        ),
+        pytest.param(
+            "1234567890",
+            OcrQualityGate(min_chars_per_page=5, min_alpha_ratio=0.6, min_printable_ratio=0.9),
+            10,
+            False,
+            id="low-alpha-ratio",
+        ),
+    ],
+)
+def test_passes_quality_gate(
+    text: str, gate: OcrQualityGate, expected_chars: int, expected_pass: bool
+) -> None:
+    r = assess_ocr_text_quality(text)
+    assert r.looks_empty is (expected_chars == 0)
+    assert r.chars == expected_chars
+    assert passes_quality_gate(r, gate) is expected_pass
 
 
-def test_passes_quality_gate_low_alpha_ratio() -> None:
-    gate = OcrQualityGate(min_chars_per_page=5, min_alpha_ratio=0.6, min_printable_ratio=0.9)
-    r = assess_ocr_text_quality("1234567890")
-    assert passes_quality_gate(r, gate) is False
-
+def test_assess_ocr_text_quality_counts_ascii_only() -> None:
+    r = assess_ocr_text_quality("Ab\tÉ\x00 9")
+    assert r.chars == 7
+    assert r.alpha_chars == 2
+    assert r.printable_ratio == 5 / 7
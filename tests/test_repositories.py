@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from uuid import uuid4
+from uuid import UUID
 
 from ol_rag_pipeline_core.models import Chunk, Document, DocumentLink
 from ol_rag_pipeline_core.repositories.chunks import ChunkRepository
@@ -89,8 +89,9 @@ def test_processing_runs_and_errors(conn) -> None:  # noqa: ANN001
         )
     )
 
-    corr = uuid4()
-    run_id = uuid4()
+    # Fixed ids: the session schema is fresh per run, so they can't collide across runs.
+    corr = UUID("00000000-0000-4000-8000-000000000031")
+    run_id = UUID("00000000-0000-4000-8000-000000000032")
     runs.insert_run(
         ProcessingRun(
             run_id=run_id,
@@ -104,7 +105,7 @@ def test_processing_runs_and_errors(conn) -> None:  # noqa: ANN001
     )
     runs.insert_error(
         ProcessingError(
-            error_id=uuid4(),
+            error_id=UUID("00000000-0000-4000-8000-000000000033"),
             run_id=run_id,
             correlation_id=corr,
             pipeline_version="v1",
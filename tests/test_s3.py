@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+from ol_rag_pipeline_core.storage.s3 import S3Client, S3Config
+
+
+class FakePaginator:
+    def __init__(self, store: dict[str, bytes]):
+        self._store = store
+        self.pages_served = 0
+
+    def paginate(self, *, Bucket: str, Prefix: str, StartAfter: str = "", **kwargs: object):
+        keys = sorted(k for k in self._store if k.startswith(Prefix) and k > StartAfter)
+        for i in range(0, len(keys), 1000):
+            self.pages_served += 1
+            yield {"Contents": [{"Key": k} for k in keys[i : i + 1000]]}
+
+
+class FakeS3:
+    def __init__(self, store: dict[str, bytes] | None = None):
+        self.store = dict(store or {})
+        self.calls: list[tuple] = []
+        self._lock = threading.Lock()
+
+    def get_paginator(self, name: str) -> FakePaginator:
+        self.paginator = FakePaginator(self.store)
+        return self.paginator
+
+    def head_object(self, *, Bucket: str, Key: str) -> dict:
+        with self._lock:
+            self.calls.append(("head_object", Key))
+        if Key not in self.store:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"ContentLength": len(self.store[Key])}
+
+    def put_object(self, *, Bucket: str, Key: str, Body: bytes, **kwargs: object) -> None:
+        with self._lock:
+            self.calls.append(("put_object", Key))
+            self.store[Key] = Body
+
+    def upload_fileobj(
+        self, Fileobj: io.BufferedIOBase, Bucket: str, Key: str, **kwargs: object
+    ) -> None:
+        with self._lock:
+            self.calls.append(("upload_fileobj", Key, kwargs["ExtraArgs"]))
+            self.store[Key] = Fileobj.read()
+
+    def delete_object(self, *, Bucket: str, Key: str) -> None:
+        with self._lock:
+            self.calls.append(("delete_object", Key))
+            self.store.pop(Key, None)
+
+    def get_object(
+        self, *, Bucket: str, Key: str, Range: str | None = None, **kwargs: object
+    ) -> dict:
+        data = self.store[Key]
+        with self._lock:
+            self.calls.append(("get_object", Key, Range))
+        if Range is None:
+            return {"Body": io.BytesIO(data), "ETag": '"e"'}
+        lo, hi = (int(x) for x in Range.removeprefix("bytes=").split("-"))
+        if lo >= len(data):
+            raise ClientError({"Error": {"Code": "InvalidRange"}}, "GetObject")
+        part = data[lo : hi + 1]
+        return {
+            "Body": io.BytesIO(part),
+            "ETag": '"e"',
+            "ContentRange": f"bytes {lo}-{lo + len(part) - 1}/{len(data)}",
+        }
+
+
+def _client(store: dict[str, bytes] | None = None, **kwargs: int) -> tuple[S3Client, FakeS3]:
+    client = S3Client(
+        S3Config(endpoint="http://s3.invalid", bucket="b", access_key="a", secret_key="s"),
+        **kwargs,
+    )
+    fake = FakeS3(store)
+    client._client = fake
+    return client, fake
+
+
+def test_delete_prefix_deletes_only_matching_keys() -> None:
+    store = {f"library/chunks/{i:05d}.jsonl": b"x" for i in range(2500)}
+    store["library/other.jsonl"] = b"y"
+    client, fake = _client(store)
+
+    assert client.delete_prefix(prefix="library/chunks/") == 2500
+    assert list(fake.store) == ["library/other.jsonl"]
+    assert client.delete_prefix(prefix="library/chunks/") == 0
+
+
+def test_delete_prefix_async_matches_sync() -> None:
+    client, fake = _client({"a/1": b"", "a/2": b"", "b/1": b""})
+
+    assert asyncio.run(client.delete_prefix_async(prefix="a/")) == 2
+    assert list(fake.store) == ["b/1"]
+
+
+def test_get_bytes_uses_ranged_parts_for_large_objects() -> None:
+    payload = bytes(range(256)) * 40  # 10240 bytes
+    client, fake = _client({"big": payload, "small": b"abc", "empty": b""}, part_size=4096)
+
+    assert client.get_bytes("big") == payload
+    assert sorted(c[2] for c in fake.calls) == [
+        "bytes=0-4095",
+        "bytes=4096-8191",
+        "bytes=8192-10239",
+    ]
+
+    fake.calls.clear()
+    assert client.get_bytes("small") == b"abc"
+    assert len(fake.calls) == 1
+    assert client.get_bytes("empty") == b""
+
+
+def test_head_many_lists_common_prefix_once() -> None:
+    store = {f"library/raw/{i:03d}.pdf": b"x" for i in range(50)}
+    client, fake = _client(store)
+
+    keys = ["library/raw/001.pdf", "library/raw/049.pdf", "library/raw/999.pdf"]
+    assert client.head_many(keys) == {
+        "library/raw/001.pdf": True,
+        "library/raw/049.pdf": True,
+        "library/raw/999.pdf": False,
+    }
+    assert not [c for c in fake.calls if c[0] == "head_object"]
+
+    assert client.head_many(["library/raw/001.pdf", "other/x"]) == {
+        "library/raw/001.pdf": True,
+        "other/x": False,
+    }
+    assert [c[0] for c in fake.calls] == ["head_object", "head_object"]
+    assert client.head_many([]) == {}
+
+
+def test_head_many_bounds_listing_under_a_broad_prefix() -> None:
+    store = {f"library/chunks/{i:05d}.jsonl": b"" for i in range(3000)}
+    store.update({f"library/meta/{i:05d}.json": b"" for i in range(5000)})
+    store.update({f"library/zz/{i:05d}": b"" for i in range(5000)})
+    store["library/raw/a.pdf"] = b"x"
+    client, fake = _client(store)
+
+    # Unrelated keys below the smallest and above the largest wanted key are never listed.
+    assert client.head_many(["library/chunks/02990.jsonl", "library/chunks/02999.jsonl"]) == {
+        "library/chunks/02990.jsonl": True,
+        "library/chunks/02999.jsonl": True,
+    }
+    assert fake.paginator.pages_served == 1
+    assert not fake.calls
+
+    # 5000 meta keys between the two wanted keys exceed the two-page budget, so the key the
+    # listing has not reached is checked with a HEAD instead.
+    assert client.head_many(["library/raw/a.pdf", "library/chunks/b.jsonl"]) == {
+        "library/raw/a.pdf": True,
+        "library/chunks/b.jsonl": False,
+    }
+    assert fake.paginator.pages_served == 2
+    assert fake.calls == [("head_object", "library/raw/a.pdf")]
+
+
+def test_list_keys_shards_cover_every_key_once() -> None:
+    store = {f"docs/{i:040x}": b"" for i in range(0, 2**160, 2**152 + 12345)}
+    # Boundary keys and keys outside the hex alphabet must not be lost or duplicated.
+    store.update({k: b"" for k in ["docs/", "docs/4", "docs/8", "docs/Z", "docs/~x", "docs/é"]})
+    store["other/0"] = b""
+    client, _ = _client(store)
+
+    expected = client.list_keys(prefix="docs/")
+    assert expected == sorted(k for k in store if k.startswith("docs/"))
+    for shards in (2, 3, 4, 16, 64):
+        assert client.list_keys(prefix="docs/", shards=shards) == expected
+
+
+def test_put_bytes_uses_multipart_upload_for_large_payloads() -> None:
+    client, fake = _client(part_size=4096)
+
+    assert client.put_bytes("small", b"abc") == "s3://b/small"
+    assert client.put_bytes("big", b"x" * 4096, content_type="text/plain") == "s3://b/big"
+    assert fake.calls == [
+        ("put_object", "small"),
+        ("upload_fileobj", "big", {"ContentType": "text/plain"}),
+    ]
+    assert fake.store == {"small": b"abc", "big": b"x" * 4096}
+
+
+def test_list_keys_iter_fetches_pages_lazily() -> None:
+    client, fake = _client({f"p/{i:05d}": b"" for i in range(2500)})
+
+    keys = client.list_keys_iter(prefix="p/")
+    assert next(keys) == "p/00000"
+    assert fake.paginator.pages_served == 1
+    assert sum(1 for _ in keys) == 2499
+    assert fake.paginator.pages_served == 3
+
+
+def test_s3_clients_with_same_credentials_share_botocore_client() -> None:
+    cfg = S3Config(endpoint="http://s3.invalid", bucket="b", access_key="a", secret_key="s")
+    a = S3Client(cfg)
+    b = S3Client(S3Config(endpoint=cfg.endpoint, bucket="other", access_key="a", secret_key="s"))
+    c = S3Client(S3Config(endpoint=cfg.endpoint, bucket="b", access_key="a2", secret_key="s"))
+
+    assert a._client is b._client
+    assert a._client is not c._client
+    assert (a.bucket, b.bucket) == ("b", "other")
+
+
+def test_uri_methods_resolve_keys_in_own_bucket_only() -> None:
+    client, fake = _client({"a/b.txt": b"hi"})
+
+    assert client.get_bytes_uri("s3://b/a/b.txt") == b"hi"
+    for uri in ["s3://other/a/b.txt", "s3://b/", "s3://bb/a/b.txt", "http://b/a/b.txt"]:
+        with pytest.raises(ValueError):
+            client.get_bytes_uri(uri)
+    client.delete_uri("s3://b/a/b.txt")
+    assert fake.store == {}
@@ -1,4 +1,14 @@
-from ol_rag_pipeline_core.util import sha256_bytes, stable_document_id
+import json
+
+import pytest
+
+from ol_rag_pipeline_core.util import (
+    count_ascii_alpha,
+    json_loads,
+    sha256_bytes,
+    sha256_many,
+    stable_document_id,
+)
 
 
 def test_sha256_bytes() -> None:
@@ -8,7 +18,26 @@ def test_sha256_bytes() -> None:
     )
 
 
+def test_sha256_many_matches_sha256_bytes_in_order() -> None:
+    datas = [b"abc", b"", b"x" * 100_000]
+    assert sha256_many(datas) == [sha256_bytes(d) for d in datas]
+    assert sha256_many([]) == []
+
+
 def test_stable_document_id_is_deterministic() -> None:
     a = stable_document_id("nextcloud", "nextcloud://ETL/Ingest/a.pdf")
     b = stable_document_id("nextcloud", "nextcloud://ETL/Ingest/a.pdf")
     assert a == b
+
+
+def test_json_loads_accepts_bytes_and_str() -> None:
+    assert json_loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+    assert json_loads(' ["x"] ') == ["x"]
+    with pytest.raises(json.JSONDecodeError):
+        json_loads("   ")
+
+
+def test_count_ascii_alpha_ignores_non_ascii_letters() -> None:
+    assert count_ascii_alpha("Abc 123 éß Z_z") == 5
+    assert count_ascii_alpha(b"Abc \xc3\xa9 Z") == 4
+    assert count_ascii_alpha("") == 0
@@ -10,3 +10,21 @@ def test_validate_extracted_text_too_short() -> None:
     issues = validate_extracted_text(text="hello", content_type="text/plain", min_chars=10)
     assert any(i.code == "extraction_too_short" for i in issues)
 
+
+def test_validate_extracted_text_too_short_skips_alpha_ratio_by_default() -> None:
+    issues = validate_extracted_text(text="1234", content_type="text/plain", min_chars=10)
+    assert [i.code for i in issues] == ["extraction_too_short"]
+
+    issues = validate_extracted_text(
+        text="1234", content_type="text/plain", min_chars=10, short_circuit_on_too_short=False
+    )
+    assert [i.code for i in issues] == ["extraction_too_short", "extraction_low_alpha_ratio"]
+
+
+def test_validate_extracted_text_low_alpha_ratio() -> None:
+    issues = validate_extracted_text(
+        text="Ab 12345678 ÉÉ 90", content_type="text/plain", min_chars=5, min_alpha_ratio=0.2
+    )
+    low = [i for i in issues if i.code == "extraction_low_alpha_ratio"]
+    assert len(low) == 1
+    assert low[0].details and low[0].details["alpha_ratio"] == round(2 / 17, 4)
@@ -1,34 +1,51 @@
 from __future__ import annotations
 
+import copy
+import dataclasses
+import pickle
 import sqlite3
 
-from ol_rag_pipeline_core.sources.vatican_sqlite import discover_document_rows
+import pytest
 
+from ol_rag_pipeline_core.sources import vatican_sqlite
+from ol_rag_pipeline_core.sources.vatican_sqlite import (
+    VaticanSqliteDocumentRow,
+    _neyman_allocation,
+    discover_document_rows,
+)
 
-def test_discover_document_rows_filters_by_hosts(tmp_path) -> None:
-    db_path = tmp_path / "vatican.db"
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(
-            """
-            create table documents (
-              id text primary key,
-              link text not null,
-              title text
-            )
-            """
+
+def _insert_documents(conn: sqlite3.Connection, columns: str, rows: list[tuple]) -> None:
+    # One multi-row insert: a single prepared statement instead of a step per row.
+    placeholders = "(" + ", ".join("?" * len(rows[0])) + ")"
+    conn.execute(
+        f"insert into documents({columns}) values {', '.join([placeholders] * len(rows))}",
+        [v for row in rows for v in row],
+    )
+
+
+def test_discover_document_rows_filters_by_hosts(sqlite_conn: sqlite3.Connection) -> None:
+    conn = sqlite_conn
+    conn.execute(
+        """
+        create table documents (
+          id text primary key,
+          link text not null,
+          title text
         )
-        conn.execute(
-            "insert into documents(id, link, title) values (?, ?, ?)",
+        """
+    )
+    _insert_documents(
+        conn,
+        "id, link, title",
+        [
             ("1", "https://archive.org/details/example", "Example Archive"),
-        )
-        conn.execute(
-            "insert into documents(id, link, title) values (?, ?, ?)",
             ("2", "https://www.vatican.va/content/test", "Example Vatican"),
-        )
-        conn.commit()
+        ],
+    )
 
     rows = discover_document_rows(
-        str(db_path),
+        conn,
         limit=10,
         hosts=["archive.org"],
     )
@@ -36,30 +53,61 @@ def test_discover_document_rows_filters_by_hosts(tmp_path) -> None:
     assert rows[0].url == "https://archive.org/details/example"
 
 
-def test_discover_document_rows_samples_per_host(tmp_path) -> None:
-    db_path = tmp_path / "vatican.db"
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(
-            """
-            create table documents (
-              id text primary key,
-              link text not null
-            )
-            """
-        )
-        conn.executemany(
-            "insert into documents(id, link) values (?, ?)",
-            [
-                ("1", "https://archive.org/details/a"),
-                ("2", "https://archive.org/details/b"),
-                ("3", "https://www.vatican.va/content/a"),
-                ("4", "https://www.vatican.va/content/b"),
-            ],
+def test_discover_document_rows_host_filter_is_exact(sqlite_conn: sqlite3.Connection) -> None:
+    conn = sqlite_conn
+    conn.execute("create table documents (id integer primary key, link text not null)")
+    _insert_documents(
+        conn,
+        "link",
+        [
+            ("HTTPS://Archive.ORG/details/upper",),
+            ("https://archive.org.example.com/details/suffix",),
+            ("https://example.com/?u=archive.org",),
+            ("https://archive\t.org/details/tab",),
+        ],
+    )
+
+    rows = discover_document_rows(conn, limit=None, hosts=["archive.org"])
+    assert [r.url for r in rows] == [
+        "HTTPS://Archive.ORG/details/upper",
+        "https://archive\t.org/details/tab",
+    ]
+
+    # The prefilter must not depend on LIKE's case sensitivity on a caller's connection.
+    conn.execute("pragma case_sensitive_like = on")
+    try:
+        rows = discover_document_rows(conn, limit=None, hosts=["archive.org"])
+    finally:
+        conn.execute("pragma case_sensitive_like = off")
+    assert [r.url for r in rows] == [
+        "HTTPS://Archive.ORG/details/upper",
+        "https://archive\t.org/details/tab",
+    ]
+
+
+def test_discover_document_rows_samples_per_host(sqlite_conn: sqlite3.Connection) -> None:
+    conn = sqlite_conn
+    conn.execute(
+        """
+        create table documents (
+          id text primary key,
+          link text not null
         )
-        conn.commit()
+        """
+    )
+    _insert_documents(
+        conn,
+        "id, link",
+        [
+            ("1", "https://archive.org/details/a"),
+            ("2", "https://archive.org/details/b"),
+            ("3", "https://www.vatican.va/content/a"),
+            ("4", "https://www.vatican.va/content/b"),
+        ],
+    )
 
     rows = discover_document_rows(
-        str(db_path),
+        conn,
         limit=10,
         hosts=["archive.org", "www.vatican.va"],
         sample_per_host=1,
@@ -70,3 +118,227 @@ def test_discover_document_rows_samples_per_host(tmp_path) -> None:
         "https://www.vatican.va/content/a",
     }
 
+
+def test_discover_document_rows_uses_stored_host_column(sqlite_conn: sqlite3.Connection) -> None:
+    conn = sqlite_conn
+    conn.execute(
+        "create table documents (id integer primary key, link text not null, host text not null)"
+    )
+    conn.execute("create index documents_host_idx on documents(host)")
+    # The stored host is trusted as-is: the mirror row is filed under archive.org.
+    _insert_documents(
+        conn,
+        "link, host",
+        [
+            ("https://archive.org/details/a", "archive.org"),
+            ("https://mirror.example.com/details/b", "archive.org"),
+            ("https://archive.org/details/c", "archive.org"),
+            ("https://www.vatican.va/content/a", "www.vatican.va"),
+            ("https://www.vatican.va/content/b", "www.vatican.va"),
+        ],
+    )
+
+    rows = discover_document_rows(conn, limit=None, hosts=["Archive.org"])
+    assert [r.url for r in rows] == [
+        "https://archive.org/details/a",
+        "https://mirror.example.com/details/b",
+        "https://archive.org/details/c",
+    ]
+
+    rows = discover_document_rows(
+        conn, limit=None, hosts=["archive.org", "www.vatican.va"], sample_per_host=1
+    )
+    assert [r.url for r in rows] == [
+        "https://archive.org/details/a",
+        "https://www.vatican.va/content/a",
+    ]
+
+    rows = discover_document_rows(
+        conn,
+        limit=None,
+        hosts=["archive.org", "www.vatican.va"],
+        sample_per_host=2,
+        allocation="neyman",
+    )
+    assert [r.url for r in rows] == [
+        "https://archive.org/details/a",
+        "https://mirror.example.com/details/b",
+        "https://www.vatican.va/content/a",
+        "https://www.vatican.va/content/b",
+    ]
+
+
+def test_neyman_allocation_is_sqrt_proportional_and_sums_to_budget() -> None:
+    assert _neyman_allocation({"a": 900, "b": 100}, 8) == {"a": 6, "b": 2}
+    assert _neyman_allocation({"a": 10_000, "b": 1, "c": 1}, 3) == {"a": 1, "b": 1, "c": 1}
+    assert _neyman_allocation({"a": 2, "b": 400}, 10) == {"a": 1, "b": 9}
+    assert _neyman_allocation({"a": 1, "b": 1, "c": 10}, 9) == {"a": 1, "b": 1, "c": 7}
+    assert _neyman_allocation({"a": 1, "b": 2}, 9) == {"a": 1, "b": 2}
+    assert _neyman_allocation({"a": 5, "b": 5, "c": 5}, 2) == {"a": 1, "b": 1, "c": 1}
+    assert _neyman_allocation({"a": 0}, 5) == {}
+
+
+def test_discover_document_rows_neyman_allocation(sqlite_conn: sqlite3.Connection) -> None:
+    conn = sqlite_conn
+    conn.execute("create table documents (id integer primary key, link text not null)")
+    _insert_documents(
+        conn,
+        "link",
+        [(f"https://archive.org/details/{i}",) for i in range(9)]
+        + [("https://www.vatican.va/content/0",)],
+    )
+
+    rows = discover_document_rows(
+        conn,
+        limit=None,
+        hosts=["archive.org", "www.vatican.va"],
+        sample_per_host=2,
+        allocation="neyman",
+    )
+    assert [r.url for r in rows] == [
+        "https://archive.org/details/0",
+        "https://archive.org/details/1",
+        "https://archive.org/details/2",
+        "https://www.vatican.va/content/0",
+    ]
+
+
+def test_discover_document_rows_parses_json_columns(sqlite_conn: sqlite3.Connection) -> None:
+    conn = sqlite_conn
+    conn.execute(
+        """
+        create table documents (
+          id text primary key,
+          link text not null,
+          categories_json text,
+          raw_json text
+        )
+        """
+    )
+    conn.execute(
+        "insert into documents(id, link, categories_json, raw_json) values (?, ?, ?, ?)",
+        ("1", "https://www.vatican.va/content/a", '[" Encyclicals ", null, ""]', '{"k": "v"}'),
+    )
+
+    rows = discover_document_rows(conn, limit=10)
+    assert rows[0].categories == ["Encyclicals"]
+    assert rows[0].raw_json_text == '{"k": "v"}'
+    assert rows[0].raw_json == {"k": "v"}
+    # Slotted rows: no per-instance __dict__, and the lazy parse still caches.
+    assert not hasattr(rows[0], "__dict__")
+    assert rows[0].raw_json is rows[0].raw_json
+
+
+def test_document_row_raw_json_survives_pickle_and_copy() -> None:
+    row = VaticanSqliteDocumentRow(row_id="1", url="https://x", raw_json_text='{"k": "v"}')
+    for clone in (pickle.loads(pickle.dumps(row)), copy.deepcopy(row), copy.copy(row)):
+        assert clone == row
+        assert clone.raw_json == {"k": "v"}
+    assert row.raw_json == {"k": "v"}
+    assert pickle.loads(pickle.dumps(row)).raw_json == {"k": "v"}
+    assert "_raw_json" not in dataclasses.asdict(row)
+    assert repr(row).startswith("VaticanSqliteDocumentRow(row_id='1'")
+
+
+def test_discover_document_rows_partitions_are_disjoint_and_complete(
+    sqlite_conn: sqlite3.Connection,
+) -> None:
+    conn = sqlite_conn
+    conn.execute("create table documents (id, link text not null)")
+    _insert_documents(
+        conn,
+        "id, link",
+        [(i, f"https://www.vatican.va/content/{i}") for i in range(10)]
+        + [
+            ("x-1", "https://www.vatican.va/content/x1"),
+            ("-3", "https://www.vatican.va/content/n3"),
+        ],
+    )
+
+    parts = [
+        {
+            r.row_id
+            for r in discover_document_rows(
+                conn, limit=None, partition_index=i, num_partitions=3
+            )
+        }
+        for i in range(3)
+    ]
+    assert parts[1] == {"1", "4", "7"}
+    assert not (parts[0] & parts[1]) and not (parts[0] & parts[2]) and not (parts[1] & parts[2])
+    assert set().union(*parts) == {str(i) for i in range(10)} | {"x-1", "-3"}
+
+
+def test_discover_document_rows_fallback_scans_without_rowid_tables(
+    sqlite_conn: sqlite3.Connection,
+) -> None:
+    conn = sqlite_conn
+    conn.execute("create table pages (slug text primary key, page_url text) without rowid")
+    conn.execute(
+        "insert into pages values (?, ?), (?, ?)",
+        ("b", "https://www.vatican.va/b", "a", "https://archive.org/a"),
+    )
+
+    rows = discover_document_rows(conn, limit=None)
+    assert [(r.row_id, r.url) for r in rows] == [
+        ("a", "https://archive.org/a"),
+        ("b", "https://www.vatican.va/b"),
+    ]
+    rows = discover_document_rows(conn, limit=None, hosts=["www.vatican.va"])
+    assert [r.row_id for r in rows] == ["b"]
+
+
+def test_discover_document_rows_samples_without_rowid_documents(
+    sqlite_conn: sqlite3.Connection,
+) -> None:
+    conn = sqlite_conn
+    conn.execute("create table documents (id text primary key, link text not null) without rowid")
+    _insert_documents(
+        conn,
+        "id, link",
+        [
+            ("2", "https://a.org/2"),
+            ("1", "https://a.org/1"),
+            ("4", "https://b.org/4"),
+            ("3", "https://b.org/3"),
+            ("5", "https://b.org/5"),
+        ],
+    )
+
+    hosts = ["a.org", "b.org"]
+    rows = discover_document_rows(conn, limit=None, hosts=hosts, sample_per_host=1)
+    # Without a rowid, each host's sample follows primary-key order.
+    assert [r.row_id for r in rows] == ["1", "3"]
+    rows = discover_document_rows(
+        conn, limit=None, hosts=hosts, sample_per_host=1, allocation="neyman"
+    )
+    assert [r.row_id for r in rows] == ["1", "3"]
+
+
+def test_discover_document_rows_sees_regenerated_file(tmp_path) -> None:
+    db_path = tmp_path / "vatican.db"
+
+    def _write(urls: list[str]) -> None:
+        tmp = tmp_path / "vatican.db.tmp"
+        with sqlite3.connect(tmp) as conn:
+            conn.execute("create table documents (id integer primary key, link text not null)")
+            _insert_documents(conn, "link", [(u,) for u in urls])
+            conn.commit()
+        tmp.replace(db_path)
+
+    _write(["https://archive.org/details/old"])
+    assert [r.url for r in discover_document_rows(str(db_path))] == [
+        "https://archive.org/details/old"
+    ]
+
+    _, old_conn, _ = vatican_sqlite._RO_CONNECTIONS[str(db_path.absolute())]
+
+    _write(["https://archive.org/details/new-1", "https://archive.org/details/new-2"])
+    assert [r.url for r in discover_document_rows(str(db_path))] == [
+        "https://archive.org/details/new-1",
+        "https://archive.org/details/new-2",
+    ]
+    # The handle for the replaced file is closed rather than kept around in the cache.
+    with pytest.raises(sqlite3.ProgrammingError):
+        old_conn.execute("select 1")
+    assert vatican_sqlite._RO_CONNECTIONS[str(db_path.absolute())][1] is not old_conn